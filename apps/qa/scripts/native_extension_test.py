@@ -2,61 +2,483 @@
 """
 Native Extension Testing using macOS Automation
 
-This script uses AppleScript, cliclick, and screenshot analysis to test
+This script uses AppleScript, Quartz events, and screenshot analysis to test
 the Chrome extension popup without Playwright's tab context limitations.
 
 Prerequisites:
 - Chrome installed at /Applications/Google Chrome.app
-- cliclick: brew install cliclick
+- pyobjc Quartz bindings: pip install pyobjc-framework-Quartz
 - Extension built at apps/extension/dist
+- Optional: websockets (pip install websockets) to read form fields over the
+  DevTools Protocol. Chrome is always launched with --remote-debugging-port=0
+  (a free local port, recorded in DevToolsActivePort in the profile). Without
+  websockets, fields are read via AppleScript, which needs View → Developer →
+  Allow JavaScript from Apple Events enabled in Chrome.
 
 Usage:
     python3 native_extension_test.py
 
+    # Use a throwaway Chrome profile instead of the cached one
+    # (needed for concurrent runs, which would otherwise share one profile)
+    FRESH_PROFILE=1 python3 native_extension_test.py
+
 """
 
 import subprocess
 import time
 import os
+import selectors
 import sys
 import json
+import shutil
 import tempfile
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import Quartz
+except ImportError:  # Checked in check_prerequisites()
+    Quartz = None
+
+try:
+    from websockets.sync.client import connect as ws_connect
+except ImportError:  # Optional: form fields are read via AppleScript instead
+    ws_connect = None
+
 # Paths
-PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+PROJECT_ROOT = Path(__file__).parents[3]
 EXTENSION_PATH = PROJECT_ROOT / "apps" / "extension" / "dist"
+CONFIG_FILE = (PROJECT_ROOT / "apps/qa/scripts/.extension-coords").resolve()
 TEST_FORM_URL = "http://127.0.0.1:8765/test-llm-form.html"
 CHROME_PATH = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+# Reused across runs so Chrome doesn't rebuild its profile every launch
+CHROME_PROFILE_DIR = Path.home() / ".cache" / "asterisk-qa" / "chrome-profile"
+
+# osascript -i echoes prompts and results with these markers
+OSA_PROMPTS = (">> ", "?> ", "=> ")
+# Longest we wait on a single coprocess answer before restarting osascript
+OSA_TIMEOUT = 3.0
+# Apple event timeout for System Events queries, so one unresponsive app in the
+# accessibility tree fails the query fast instead of stalling it. It applies to
+# each Apple event, so callers give the coprocess _ax_deadline(events) to answer
+AX_TIMEOUT = 2
+# Headroom on top of the Apple event timeouts for osascript itself
+OSA_SLACK = 1.0
+
+# Grace period between SIGTERM and SIGKILL when closing Chrome. A SIGKILL
+# leaves the cached profile marked as crashed, but launch_chrome() clears
+# that marker before the next run, so no longer wait is needed
+CHROME_TERM_GRACE = 1.5
+
+# Readiness polling: check every POLL_INTERVAL seconds, give up after the timeout
+POLL_INTERVAL = 0.05
+CHROME_READY_TIMEOUT = 8.0
+MENU_DETECT_TIMEOUT = 1.5
+# New Chrome windows shorter than this (in points) are tooltips, not bubbles
+MIN_BUBBLE_HEIGHT = 60
+# Extensions menu filter: look for Asterisk this many times, this far apart
+MENU_FILTER_ATTEMPTS = 10
+MENU_FILTER_INTERVAL = 0.03
+
+# Size of the screenshot region captured below the extension icon (popup area)
+POPUP_REGION_SIZE = (400, 650)
+JPEG_QUALITY = 0.6
+
+# Popup snapshots are reused for this long before hitting Accessibility again
+SNAPSHOT_TTL = 1.0
+# Separators for the fused popup snapshot (record / unit separator symbols)
+SNAPSHOT_FIELD_SEP = "␞"
+SNAPSHOT_TEXT_SEP = "␟"
+
+# Returned by the field-reading JavaScript when the element doesn't exist
+FIELD_NOT_FOUND = "FIELD_NOT_FOUND"
+
+# Wraps a snippet so its result comes back tagged with its type, e.g.
+# BOOL:true, STR:some text or ERR:message
+OSA_TYPED_WRAPPER = """
+try
+    set osaResult to (run script "{body}")
+    if class of osaResult is boolean then return "BOOL:" & osaResult
+    return "STR:" & (osaResult as text)
+on error errMsg
+    return "ERR:" & errMsg
+end try
+"""
+
+# Parameterized handlers, compiled with osacompile on first use and run with
+# `on run argv` arguments. _osa_compiled() sends a one-line `run script` call
+# straight to the coprocess, so the only source parsed per call is that line;
+# caller-supplied text is escaped (_osa_quote) into it, never into the handler
+# source. Handlers tag their own results like OSA_TYPED_WRAPPER does.
+COMPILED_SCRIPTS = {
+    "click_button": f"""
+on run argv
+    set buttonText to item 1 of argv
+    set chromePid to (item 2 of argv) as integer
+    try
+        tell application "System Events"
+            with timeout of {AX_TIMEOUT} seconds
+                tell (first process whose unix id is chromePid)
+                    click button buttonText of front window
+                end tell
+            end timeout
+        end tell
+        return "BOOL:true"
+    on error errMsg
+        return "ERR:" & errMsg
+    end try
+end run
+""",
+    # argv item 1 is the field id already encoded as a JavaScript string literal
+    "read_field": """
+on run argv
+    set fieldIdLiteral to item 1 of argv
+    try
+        tell application "Google Chrome"
+            tell active tab of front window
+                set fieldValue to execute javascript "(() => { const field = document.getElementById(" & fieldIdLiteral & "); return field ? field.value : 'FIELD_NOT_FOUND'; })()"
+            end tell
+        end tell
+        return "STR:" & fieldValue
+    on error errMsg
+        return "ERR:" & errMsg
+    end try
+end run
+""",
+}
+
+
+def _osa_quote(script):
+    """Escape an AppleScript snippet so it can be embedded in a string literal"""
+    return (
+        script.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _parse_osa_output(lines):
+    """
+    Strip interactive prompts from osascript -i output and unquote the result.
+
+    Only the leading prompt markers are removed; the rest of each line is
+    kept as is, so whitespace and blank lines inside multi-line results
+    survive. Lines that held nothing but prompts are dropped.
+    """
+    values = []
+    for line in lines:
+        line = line.rstrip("\n")
+        had_prompt = False
+        stripped = True
+        while stripped:
+            stripped = False
+            for prompt in OSA_PROMPTS:
+                if line.startswith(prompt):
+                    line = line[len(prompt):]
+                    had_prompt = stripped = True
+        if had_prompt and not line:
+            continue
+        values.append(line)
+
+    output = "\n".join(values)
+    if len(output) >= 2 and output.startswith('"') and output.endswith('"'):
+        output = output[1:-1]
+    return output
+
+
+def _ax_deadline(events, extra=0.0):
+    """
+    Coprocess deadline for a script sending up to `events` System Events
+    queries under `with timeout of AX_TIMEOUT`, plus `extra` seconds of delays.
+
+    Sized so a query that times out still reaches the script's own error
+    handling instead of osascript being killed first.
+    """
+    return events * AX_TIMEOUT + extra + OSA_SLACK
+
+
+def _popup_region(x, y):
+    """
+    Screenshot rectangle (x, y, width, height) covering the popup, which
+    opens below the extension icon and roughly centred on it
+    """
+    w, h = POPUP_REGION_SIZE
+    return (x - w // 2, y, w, h)
 
 
 class ChromeExtensionTester:
     def __init__(self):
         self.chrome_process = None
         self.user_data_dir = None
+        self.fresh_profile = bool(os.environ.get("FRESH_PROFILE"))
         self.screenshots = []
+        self._icon_pos = None
+        self._snapshot = None
+        self._snapshot_at = 0.0
+        self._devtools = None
+        self._devtools_id = 0
+
+        # One long-lived osascript instead of a fresh process per check,
+        # started on first use by _run_osa()
+        self._osa = None
+        self._osa_pending = b""
+
+        # Compiled COMPILED_SCRIPTS handlers, built on first use by _osa_compiled()
+        self._script_dir = None
+        self._compiled = {}
+
+    def _compile_script(self, name):
+        """Compile one COMPILED_SCRIPTS handler to a .scpt so later calls skip the parse phase"""
+        if self._script_dir is None:
+            self._script_dir = tempfile.mkdtemp(prefix="asterisk-osa-")
+
+        path = os.path.join(self._script_dir, f"{name}.scpt")
+        subprocess.run(
+            ["osacompile", "-o", path, "-e", COMPILED_SCRIPTS[name]],
+            capture_output=True,
+            check=True
+        )
+        self._compiled[name] = path
 
-    def check_prerequisites(self):
-        """Verify all required tools are available"""
-        print("🔍 Checking prerequisites...")
+    def _osa_compiled(self, name, *args, timeout=OSA_TIMEOUT):
+        """
+        Run a precompiled handler, passing `args` to its run handler.
 
-        # Check Chrome
-        if not os.path.exists(CHROME_PATH):
-            print(f"❌ Chrome not found at {CHROME_PATH}")
+        The handler is compiled the first time it is needed. Returns a
+        (kind, value) pair like _osa_typed().
+        """
+        if name not in self._compiled:
+            self._compile_script(name)
+
+        params = ", ".join(f'"{_osa_quote(str(arg))}"' for arg in args)
+        output = self._send_osa(
+            f'run script (POSIX file "{self._compiled[name]}") with parameters {{{params}}}',
+            timeout
+        )
+        kind, _, value = output.partition(":")
+        return kind, value
+
+    def _start_osa(self):
+        """Start the persistent `osascript -i` coprocess"""
+        self._osa = subprocess.Popen(
+            ["osascript", "-i"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0
+        )
+        self._osa_pending = b""
+
+    def _stop_osa(self):
+        """Shut down the osascript coprocess, killing it if it doesn't exit"""
+        if self._osa and self._osa.poll() is None:
+            try:
+                self._osa.stdin.close()
+                self._osa.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self._osa.kill()
+                self._osa.wait()
+
+    def _kill_osa(self):
+        """Kill a wedged or dead osascript coprocess without waiting for it to exit on its own"""
+        if self._osa.poll() is None:
+            self._osa.kill()
+        self._osa.wait()
+
+    def _run_osa(self, script, timeout=OSA_TIMEOUT):
+        """
+        Run an AppleScript snippet through the persistent osascript coprocess.
+
+        The snippet is wrapped in `run script` so it executes as a standalone
+        script (top-level `return` works).
+        """
+        return self._send_osa(f'run script "{_osa_quote(script.strip())}"', timeout)
+
+    def _send_osa(self, line, timeout=OSA_TIMEOUT):
+        """
+        Send one line of AppleScript to the coprocess and return its result.
+
+        The line is followed by a sentinel string whose echo marks the end
+        of the output. Output is read without blocking; if the sentinel
+        doesn't arrive within `timeout` seconds the coprocess is assumed
+        wedged, replaced with a fresh one, and an empty result is returned.
+        """
+        sentinel = f"__END__{uuid.uuid4().hex}".encode()
+
+        if self._osa is None:
+            self._start_osa()
+
+        try:
+            self._osa.stdin.write(
+                f"{line}\n".encode() + b'"' + sentinel + b'"\n'
+            )
+        except OSError:
+            print("   ⚠️  osascript coprocess died, restarting it")
+            self._kill_osa()
+            self._start_osa()
+            return ""
+
+        fd = self._osa.stdout.fileno()
+        buf = self._osa_pending
+        deadline = time.monotonic() + timeout
+
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+
+            # Read until the sentinel's whole line has arrived
+            while sentinel not in buf or b"\n" not in buf[buf.index(sentinel):]:
+                remaining = deadline - time.monotonic()
+                chunk = os.read(fd, 65536) if remaining > 0 and sel.select(remaining) else None
+                if chunk is None:
+                    print(f"   ⚠️  osascript gave no answer within {timeout}s, restarting it")
+                    self._kill_osa()
+                    self._start_osa()
+                    return ""
+                if not chunk:
+                    print(f"   ⚠️  osascript exited (code {self._osa.wait()}), restarting it")
+                    self._start_osa()
+                    return ""
+                buf += chunk
+
+        end = buf.index(sentinel)
+        # Keep whatever follows the sentinel line (usually the next prompt)
+        self._osa_pending = buf[buf.index(b"\n", end) + 1:]
+
+        # Drop the partial line holding the sentinel echo
+        output = buf[:end].decode("utf-8", errors="replace").rpartition("\n")[0]
+        return _parse_osa_output(output.splitlines())
+
+    def _osa_typed(self, script, timeout=OSA_TIMEOUT):
+        """
+        Run a snippet and return its result as a (kind, value) pair.
+
+        `kind` is "BOOL", "STR" or "ERR"; it is empty if the coprocess gave
+        no answer.
+        """
+        output = self._run_osa(OSA_TYPED_WRAPPER.format(body=_osa_quote(script.strip())), timeout)
+        kind, _, value = output.partition(":")
+        return kind, value
+
+    def _osa_bool(self, script, timeout=OSA_TIMEOUT):
+        """Run a snippet that returns a boolean; anything else counts as False"""
+        return self._osa_typed(script, timeout) == ("BOOL", "true")
+
+    def _osa_str(self, script, timeout=OSA_TIMEOUT):
+        """Run a snippet and return its result as text, or None if it errored"""
+        return self._typed_text(*self._osa_typed(script, timeout))
+
+    @staticmethod
+    def _typed_text(kind, value):
+        """Text of a (kind, value) result, or None (reporting it) if it errored"""
+        if kind in ("STR", "BOOL"):
+            return value
+        if kind == "ERR":
+            print(f"   ⚠️  AppleScript error: {value}")
+        return None
+
+    def _chrome_ax_process(self):
+        """
+        System Events reference to the Chrome we launched.
+
+        `process "Google Chrome"` resolves to whichever Chrome started first,
+        usually the developer's everyday browser, so match on the PID instead.
+        """
+        return f"(first process whose unix id is {self.chrome_process.pid})"
+
+    def _poll(self, predicate, timeout):
+        """
+        Call `predicate` until it returns true or `timeout` elapses.
+
+        Returns True as soon as the predicate holds, False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if predicate():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
+
+    def _devtools_targets(self):
+        """
+        Return (port, targets) from the test Chrome's DevTools /json endpoint.
+
+        The port comes from DevToolsActivePort in our profile directory, so
+        this only ever talks to the Chrome we launched. Raises if Chrome
+        hasn't written it yet or isn't answering.
+        """
+        port_file = Path(self.user_data_dir) / "DevToolsActivePort"
+        port = int(port_file.read_text().splitlines()[0])
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json", timeout=1) as resp:
+            return port, json.load(resp)
+
+    def _chrome_ready(self):
+        """True once our Chrome process is up and has the test form tab open"""
+        if self.chrome_process.poll() is not None:
             return False
+        try:
+            _, targets = self._devtools_targets()
+        except (OSError, ValueError, IndexError):
+            return False
+        return any(
+            t.get("type") == "page" and t.get("url", "").startswith(TEST_FORM_URL)
+            for t in targets
+        )
+
+    def _click(self, x, y):
+        """Post a left mouse click at screen coordinates (x, y) via Quartz"""
+        for event_type in (Quartz.kCGEventLeftMouseDown, Quartz.kCGEventLeftMouseUp):
+            event = Quartz.CGEventCreateMouseEvent(
+                None, event_type, (x, y), Quartz.kCGMouseButtonLeft
+            )
+            Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+
+    @staticmethod
+    def _check_chrome():
+        if not os.path.exists(CHROME_PATH):
+            return [f"❌ Chrome not found at {CHROME_PATH}"]
+        return []
 
-        # Check extension
+    @staticmethod
+    def _check_extension():
         if not EXTENSION_PATH.exists():
-            print(f"❌ Extension not built at {EXTENSION_PATH}")
-            print("   Run: cd apps/extension && pnpm build")
-            return False
+            return [
+                f"❌ Extension not built at {EXTENSION_PATH}",
+                "   Run: cd apps/extension && pnpm build",
+            ]
+        return []
+
+    @staticmethod
+    def _check_quartz():
+        # Used for synthetic clicks and screenshots
+        if Quartz is None:
+            return [
+                "❌ pyobjc Quartz bindings not installed",
+                "   Run: pip install pyobjc-framework-Quartz",
+            ]
+        return []
 
-        # Check cliclick
-        try:
-            subprocess.run(["cliclick", "-V"], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            print("⚠️  cliclick not installed. Installing...")
-            subprocess.run(["brew", "install", "cliclick"], check=True)
+    def check_prerequisites(self):
+        """
+        Verify all required tools are available.
+
+        The checks run concurrently; each returns the lines to print on
+        failure, which are reported in a fixed order.
+        """
+        print("🔍 Checking prerequisites...")
+
+        checks = (self._check_chrome, self._check_extension, self._check_quartz)
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            futures = [executor.submit(check) for check in checks]
+            results = [future.result() for future in futures]
+
+        problems = [line for lines in results for line in lines]
+        if problems:
+            for line in problems:
+                print(line)
+            return False
 
         print("✅ All prerequisites met\n")
         return True
@@ -65,64 +487,167 @@ class ChromeExtensionTester:
         """Launch Chrome with extension loaded"""
         print("🚀 Launching Chrome with extension...")
 
-        # Create temp user data directory
-        self.user_data_dir = tempfile.mkdtemp(prefix="chrome-ext-test-")
+        if self.fresh_profile:
+            # Isolated temp user data directory, removed in cleanup()
+            self.user_data_dir = tempfile.mkdtemp(prefix="chrome-ext-test-")
+        else:
+            self.user_data_dir = str(CHROME_PROFILE_DIR)
+            os.makedirs(self.user_data_dir, exist_ok=True)
+            # Don't let _connect_devtools() pick up the previous run's port
+            Path(self.user_data_dir, "DevToolsActivePort").unlink(missing_ok=True)
+            self._mark_profile_clean_exit()
+            print(f"   Reusing profile at {self.user_data_dir} (FRESH_PROFILE=1 for a clean one)")
 
         cmd = [
             CHROME_PATH,
             f"--user-data-dir={self.user_data_dir}",
             f"--load-extension={EXTENSION_PATH}",
+            "--remote-debugging-port=0",
             "--no-first-run",
             "--no-default-browser-check",
             TEST_FORM_URL,
         ]
 
+        # Own session so Ctrl-C in the terminal doesn't reach Chrome directly;
+        # cleanup() is responsible for shutting it down
         self.chrome_process = subprocess.Popen(
             cmd,
             stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
         )
 
         print(f"   Chrome PID: {self.chrome_process.pid}")
         print("⏳ Waiting for Chrome to load...")
-        time.sleep(5)
+        start = time.monotonic()
+        if self._poll(self._chrome_ready, CHROME_READY_TIMEOUT):
+            print(f"   Ready after {time.monotonic() - start:.1f}s")
+        elif self.chrome_process.poll() is not None:
+            print(f"   ⚠️  Chrome exited with code {self.chrome_process.returncode}")
+        else:
+            print(f"   ⚠️  Chrome not ready after {CHROME_READY_TIMEOUT:.0f}s, continuing anyway")
+
+        # Activate our Chrome by PID; `tell application "Google Chrome"` would
+        # target whichever Chrome instance started first
+        self._run_osa(f"""
+        tell application "System Events"
+            set frontmost of {self._chrome_ax_process()} to true
+        end tell
+        """)
 
-        # Activate Chrome window
-        subprocess.run([
-            "osascript", "-e",
-            'tell application "Google Chrome" to activate'
-        ])
+        self._connect_devtools()
 
         print("✅ Chrome launched and activated\n")
 
+    def _mark_profile_clean_exit(self):
+        """
+        Clear the cached profile's crash marker.
+
+        If a previous run had to SIGKILL Chrome, the profile is flagged as
+        crashed and the next launch shows "Restore pages?" (and may restore
+        old tabs), which throws off the window-count and front-window checks.
+        """
+        prefs_file = Path(self.user_data_dir) / "Default" / "Preferences"
+        if not prefs_file.exists():
+            return
+
+        try:
+            prefs = json.loads(prefs_file.read_text())
+            profile = prefs.setdefault("profile", {})
+            if profile.get("exit_type") == "Normal" and profile.get("exited_cleanly"):
+                return
+            profile["exit_type"] = "Normal"
+            profile["exited_cleanly"] = True
+            prefs_file.write_text(json.dumps(prefs))
+        except (OSError, ValueError) as e:
+            print(f"   ⚠️  Couldn't reset profile exit state ({e})")
+
+    def _connect_devtools(self):
+        """
+        Open a DevTools Protocol connection to the test form tab.
+
+        Chrome picks a free debugging port and writes it to DevToolsActivePort
+        in the profile directory. Requires the optional `websockets` package;
+        without it form fields are read through AppleScript.
+        """
+        if ws_connect is None:
+            print("   ℹ️  websockets not installed, reading form fields via AppleScript")
+            return
+
+        try:
+            port, targets = self._devtools_targets()
+
+            pages = [t for t in targets if t.get("type") == "page"]
+            page = next(
+                (t for t in pages if t.get("url", "").startswith(TEST_FORM_URL)),
+                pages[0] if pages else None
+            )
+            if page is None:
+                raise RuntimeError("no page target found")
+
+            self._devtools = ws_connect(page["webSocketDebuggerUrl"], max_size=None)
+            print(f"   DevTools connected on port {port}")
+        except Exception as e:
+            print(f"   ⚠️  DevTools unavailable ({e}), reading form fields via AppleScript")
+            self._devtools = None
+
+    def _cdp_evaluate(self, expression):
+        """Evaluate a JavaScript expression in the test form tab and return its value"""
+        self._devtools_id += 1
+        request_id = self._devtools_id
+
+        self._devtools.send(json.dumps({
+            "id": request_id,
+            "method": "Runtime.evaluate",
+            "params": {"expression": expression, "returnByValue": True},
+        }))
+
+        # Skip any events until our response arrives
+        while True:
+            message = json.loads(self._devtools.recv(timeout=5))
+            if message.get("id") == request_id:
+                break
+
+        if "error" in message or "exceptionDetails" in message.get("result", {}):
+            raise RuntimeError(message.get("error") or message["result"]["exceptionDetails"])
+
+        return message["result"]["result"].get("value")
+
     def find_extension_icon(self):
         """
         Find the extension icon position.
 
         1. First checks for calibrated coordinates in .extension-coords
         2. Falls back to estimated position if not calibrated
+
+        The result is cached for the lifetime of the tester.
         """
+        if self._icon_pos:
+            return self._icon_pos
+
         print("🔍 Locating extension icon...")
 
         # Check for calibrated coordinates
-        config_file = PROJECT_ROOT / "apps" / "qa" / "scripts" / ".extension-coords"
-        if config_file.exists():
+        if CONFIG_FILE.exists():
             print("   📍 Using calibrated coordinates from .extension-coords")
-            coords = {}
-            with open(config_file) as f:
-                for line in f:
-                    if '=' in line:
-                        key, val = line.strip().split('=')
-                        # Only parse coordinate values, skip metadata like METHOD
-                        if key in ['EXTENSION_ICON_X', 'EXTENSION_ICON_Y']:
-                            coords[key] = int(val)
+            # Only parse coordinate values, skip metadata like METHOD
+            coords = {
+                key: int(val)
+                for key, val in (
+                    line.strip().split('=', 1)
+                    for line in CONFIG_FILE.read_text().splitlines()
+                    if '=' in line
+                )
+                if key in ('EXTENSION_ICON_X', 'EXTENSION_ICON_Y')
+            }
 
             x = coords.get('EXTENSION_ICON_X')
             y = coords.get('EXTENSION_ICON_Y')
             if x and y:
                 print(f"   Position: ({x}, {y})")
                 print()
-                return (x, y)
+                self._icon_pos = (x, y)
+                return self._icon_pos
 
         # Fall back to estimated position
         print("   ⚠️  No calibrated coordinates found")
@@ -132,7 +657,8 @@ class ChromeExtensionTester:
         print("      cd apps/qa/scripts && ./calibrate_extension_icon.sh")
         print()
 
-        return (1250, 80)
+        self._icon_pos = (1250, 80)
+        return self._icon_pos
 
     def click_extension_icon(self, x, y):
         """
@@ -141,65 +667,94 @@ class ChromeExtensionTester:
         """
         print(f"🖱️  Clicking extension icon at ({x}, {y})...")
 
-        subprocess.run(["cliclick", f"c:{x},{y}"])
+        baseline_windows = self._chrome_window_ids()
+        self._click(x, y)
 
         print("⏳ Waiting for popup to open...")
-        time.sleep(2)
 
         # Check if we opened the extensions menu instead of Asterisk popup
-        if self.is_extensions_menu_open():
+        menu_open = self.is_extensions_menu_open(baseline_windows)
+        if menu_open is None:
+            print("   💡 If the popup didn't open, pin the extension: ./pin-extension.sh\n")
+        elif menu_open:
             print("   ℹ️  Extensions menu opened (extension not pinned)")
             print("   🔄 Trying fallback: navigate extensions menu...")
             self.navigate_extensions_menu()
         else:
             print("✅ Popup should be open\n")
 
-    def is_extensions_menu_open(self):
+    def _chrome_windows(self):
         """
-        Check if we clicked the extensions menu (puzzle piece) instead of the Asterisk icon.
-        The extensions menu is a dropdown/popover, not a new window.
+        On-screen Quartz window info dicts owned by the Chrome process we launched.
+
+        Unlike Chrome's AppleScript `windows`, this includes bubbles such as
+        the extension popup and the extensions menu. Returns None if the
+        window list can't be read.
         """
-        # Take a quick screenshot and check pixel patterns
-        # The extensions menu has a distinct appearance
+        try:
+            windows = Quartz.CGWindowListCopyWindowInfo(
+                Quartz.kCGWindowListOptionOnScreenOnly
+                | Quartz.kCGWindowListExcludeDesktopElements,
+                Quartz.kCGNullWindowID
+            )
+        except Exception:
+            return None
+        if windows is None:
+            return None
 
-        # Simpler approach: Just wait and check if window title contains "Asterisk"
-        # If not, assume we opened the wrong thing
-        time.sleep(1)
+        pid = self.chrome_process.pid
+        return [w for w in windows if w.get(Quartz.kCGWindowOwnerPID) == pid]
 
-        script = """
-        tell application "System Events"
-            tell process "Google Chrome"
-                try
-                    set windowTitle to title of front window
-
-                    -- If window title has "Asterisk", we opened the popup
-                    if windowTitle contains "Asterisk" then
-                        return false
-                    end if
-
-                    -- Otherwise, likely opened extensions menu
-                    return true
-                on error
-                    return true
-                end try
-            end tell
-        end tell
+    def _chrome_window_ids(self):
+        """Set of our Chrome's on-screen window IDs, or None if they can't be read"""
+        windows = self._chrome_windows()
+        if windows is None:
+            return None
+        return {w[Quartz.kCGWindowNumber] for w in windows}
+
+    def _new_bubble_windows(self, baseline_ids):
         """
+        Windows of our Chrome that weren't on screen in `baseline_ids` and are
+        big enough to be a bubble (hover tooltips are filtered out)
+        """
+        windows = self._chrome_windows() or []
+        return [
+            w for w in windows
+            if w[Quartz.kCGWindowNumber] not in baseline_ids
+            and w.get(Quartz.kCGWindowBounds, {}).get("Height", 0) >= MIN_BUBBLE_HEIGHT
+        ]
 
-        result = subprocess.run(
-            ["osascript", "-e", script],
-            capture_output=True,
-            text=True
-        )
+    def is_extensions_menu_open(self, baseline_windows):
+        """
+        Check if we clicked the extensions menu (puzzle piece) instead of the Asterisk icon.
+
+        Both the extension popup and the extensions menu open as new bubble
+        windows of the Chrome process, so this waits up to MENU_DETECT_TIMEOUT
+        for a window that wasn't in `baseline_windows` (IDs taken before the
+        click), then asks Accessibility once whether our Chrome has a window
+        titled Asterisk. A new bubble without that title is the menu.
 
-        is_menu = "true" in result.stdout.lower()
+        Returns None if it can't tell: the baseline couldn't be read, or no
+        new bubble appeared.
+        """
+        if baseline_windows is None:
+            print("   ⚠️  Couldn't list Chrome windows before the click; not checking for the extensions menu")
+            return None
 
-        if is_menu:
-            # Double-check with screenshot analysis
-            screenshot = self.take_screenshot("menu-check")
-            # If extensions menu is open, we'll see it in the UI
+        if not self._poll(lambda: self._new_bubble_windows(baseline_windows), MENU_DETECT_TIMEOUT):
+            print(f"   ⚠️  No new Chrome window appeared within {MENU_DETECT_TIMEOUT}s of the click")
+            return None
 
-        return is_menu
+        script = f"""
+        tell application "System Events"
+            with timeout of {AX_TIMEOUT} seconds
+                tell {self._chrome_ax_process()}
+                    return exists (first window whose title contains "Asterisk")
+                end tell
+            end timeout
+        end tell
+        """
+        return not self._osa_bool(script, timeout=_ax_deadline(1))
 
     def navigate_extensions_menu(self):
         """
@@ -208,45 +763,41 @@ class ChromeExtensionTester:
         """
         print("   🔍 Looking for 'Asterisk' in extensions menu...")
 
-        # Strategy: Use keyboard navigation in the menu
-        # Down arrow to navigate, Enter to select
-
-        # First, try to find Asterisk by typing (Chrome's menu search)
-        subprocess.run(["cliclick", "kp:a"])  # Type 'a' for Asterisk
-        time.sleep(0.5)
-
-        # Try clicking in the general area where extensions appear
-        # This is approximate - extensions menu is usually below the icon
-        script = """
+        # Type 'a' (Chrome's menu search) and click Asterisk as soon as the
+        # filtered menu shows it, all in one AppleScript call
+        script = f"""
         tell application "System Events"
-            tell process "Google Chrome"
-                -- Try to click on an element containing "Asterisk"
-                try
-                    set allElements to every UI element of front window
-                    repeat with elem in allElements
+            with timeout of {AX_TIMEOUT} seconds
+                tell {self._chrome_ax_process()}
+                    keystroke "a"
+
+                    -- contains is case-insensitive; keep the whose clause to a single
+                    -- predicate, compound whose clauses are pathologically slow
+                    repeat {MENU_FILTER_ATTEMPTS} times
                         try
-                            set elemDesc to description of elem
-                            if elemDesc contains "Asterisk" or elemDesc contains "asterisk" then
-                                click elem
+                            set hits to UI elements of front window whose description contains "Asterisk"
+                            if (count of hits) > 0 then
+                                click item 1 of hits
                                 return true
                             end if
                         end try
+                        delay {MENU_FILTER_INTERVAL}
                     end repeat
                     return false
-                on error
-                    return false
-                end try
-            end tell
+                end tell
+            end timeout
         end tell
         """
 
-        result = subprocess.run(
-            ["osascript", "-e", script],
-            capture_output=True,
-            text=True
+        # keystroke, one query per attempt and the click
+        found = self._osa_bool(
+            script,
+            timeout=_ax_deadline(MENU_FILTER_ATTEMPTS + 2, MENU_FILTER_ATTEMPTS * MENU_FILTER_INTERVAL)
         )
 
-        if "true" in result.stdout.lower():
+        self._snapshot = None
+
+        if found:
             print("   ✅ Found and clicked Asterisk in menu")
             time.sleep(2)
         else:
@@ -256,96 +807,179 @@ class ChromeExtensionTester:
 
         print()
 
-    def take_screenshot(self, name="popup"):
-        """Take a screenshot and save it"""
-        screenshot_path = f"/tmp/extension-test-{name}-{int(time.time())}.png"
-        subprocess.run(["screencapture", "-x", screenshot_path])
+    def _capture_region(self, region, path):
+        """
+        Capture the launched Chrome's on-screen windows in-process with Quartz and save a JPEG.
+
+        Only windows owned by our Chrome process are captured, never another
+        Chrome the developer has open. Returns False if Quartz is unavailable
+        or the capture fails (e.g. the API is unavailable on this macOS
+        version), so the caller can fall back to screencapture.
+        """
+        if Quartz is None or self.chrome_process is None:
+            return False
+
+        try:
+            window_ids = [w[Quartz.kCGWindowNumber] for w in self._chrome_windows() or []]
+            if not window_ids:
+                return False
+
+            if region:
+                x, y, w, h = region
+                rect = Quartz.CGRectMake(max(x, 0), max(y, 0), w, h)
+            else:
+                rect = Quartz.CGRectNull  # Bounds of the listed windows
+
+            image = Quartz.CGWindowListCreateImageFromArray(
+                rect, window_ids, Quartz.kCGWindowImageDefault
+            )
+            if image is None:
+                return False
+
+            encoded = path.encode()
+            url = Quartz.CFURLCreateFromFileSystemRepresentation(
+                None, encoded, len(encoded), False
+            )
+            dest = Quartz.CGImageDestinationCreateWithURL(url, "public.jpeg", 1, None)
+            Quartz.CGImageDestinationAddImage(
+                dest, image, {Quartz.kCGImageDestinationLossyCompressionQuality: JPEG_QUALITY}
+            )
+            return bool(Quartz.CGImageDestinationFinalize(dest))
+        except Exception as e:
+            print(f"   ⚠️  Quartz capture failed ({e}), using screencapture")
+            return False
+
+    def take_screenshot(self, name="popup", region=None):
+        """
+        Take a screenshot and save it.
+
+        If `region` is given as (x, y, width, height), only that rectangle is
+        captured; otherwise Chrome's windows are (the whole screen when
+        falling back to screencapture).
+        """
+        screenshot_path = f"/tmp/extension-test-{name}-{int(time.time())}.jpg"
+
+        if not self._capture_region(region, screenshot_path):
+            cmd = ["screencapture", "-x", "-t", "jpg"]
+            if region:
+                x, y, w, h = region
+                cmd.append(f"-R{max(x, 0)},{max(y, 0)},{w},{h}")
+            cmd.append(screenshot_path)
+            subprocess.run(cmd)
 
         self.screenshots.append(screenshot_path)
         print(f"📸 Screenshot saved: {screenshot_path}")
 
         return screenshot_path
 
-    def verify_popup_content(self):
-        """Use AppleScript to verify popup content via Accessibility APIs"""
-        print("🔍 Verifying popup content...")
+    def _snapshot_popup(self, max_age=SNAPSHOT_TTL):
+        """
+        Read the popup title, static texts and fill button in one AppleScript round-trip.
+
+        Returns a dict with `title`, `texts`, `has_fill_button` and the `raw`
+        output. Results younger than `max_age` seconds are reused.
+        """
+        if self._snapshot and time.monotonic() - self._snapshot_at < max_age:
+            return self._snapshot
 
-        script = """
+        script = f"""
         tell application "System Events"
-            tell process "Google Chrome"
-                set frontWindow to front window
-                set windowTitle to title of frontWindow
-
-                -- Try to get all static text elements
-                set textElements to {}
-                try
-                    set allElements to every UI element of frontWindow
-                    repeat with elem in allElements
+            with timeout of {AX_TIMEOUT} seconds
+                tell {self._chrome_ax_process()}
+                    set windowTitle to ""
+                    set textElements to {{}}
+                    set hasFillButton to false
+
+                    try
+                        set frontWindow to front window
+                        set windowTitle to title of frontWindow
+
+                        -- Let System Events filter static texts instead of walking every element
                         try
-                            if role of elem is "AXStaticText" then
-                                set end of textElements to value of elem
-                            end if
+                            set textElements to value of every static text of frontWindow
                         end try
-                    end repeat
-                end try
 
-                return {windowTitle:windowTitle, elements:textElements}
-            end tell
+                        try
+                            set fillButton to button "Fill All Matched Fields" of frontWindow
+                            set hasFillButton to true
+                        end try
+                    end try
+
+                    set AppleScript's text item delimiters to "{SNAPSHOT_TEXT_SEP}"
+                    set textBlob to textElements as text
+                    set AppleScript's text item delimiters to ""
+
+                    return windowTitle & "{SNAPSHOT_FIELD_SEP}" & textBlob & "{SNAPSHOT_FIELD_SEP}" & hasFillButton
+                end tell
+            end timeout
         end tell
         """
 
-        try:
-            result = subprocess.run(
-                ["osascript", "-e", script],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+        # front window, its title, the static texts and the fill button
+        kind, output = self._osa_typed(script, timeout=_ax_deadline(4))
+        fields = output.split(SNAPSHOT_FIELD_SEP)
+
+        if kind == "STR" and len(fields) == 3:
+            title, texts, has_fill_button = fields
+            snapshot = {
+                "title": title,
+                "texts": [
+                    t for t in texts.split(SNAPSHOT_TEXT_SEP)
+                    if t and t != "missing value"
+                ],
+                "has_fill_button": has_fill_button == "true",
+                "raw": output,
+                "error": None,
+            }
+        else:
+            snapshot = {
+                "title": "",
+                "texts": [],
+                "has_fill_button": False,
+                "raw": output,
+                "error": output or "no answer from osascript",
+            }
 
-            output = result.stdout.strip()
-            print(f"   Raw output: {output}")
+        self._snapshot = snapshot
+        self._snapshot_at = time.monotonic()
+        return snapshot
 
-            # Check for expected content
-            checks = {
-                "Has 'Asterisk' in title": "Asterisk" in output or "asterisk" in output.lower(),
-                "Popup window exists": len(output) > 0,
-            }
+    def verify_popup_content(self, snapshot=None):
+        """
+        Use AppleScript to verify popup content via Accessibility APIs.
 
-            print("\n   Verification Results:")
-            for check, passed in checks.items():
-                status = "✅" if passed else "❌"
-                print(f"   {status} {check}")
+        An already-taken `snapshot` from _snapshot_popup() can be passed in.
+        """
+        print("🔍 Verifying popup content...")
 
-            return all(checks.values())
+        snapshot = snapshot or self._snapshot_popup()
+        output = snapshot["raw"]
+        print(f"   Raw output: {output}")
 
-        except subprocess.CalledProcessError as e:
-            print(f"   ❌ Failed to verify: {e.stderr}")
+        if snapshot["error"]:
+            print(f"   ❌ Failed to verify: {snapshot['error']}")
             return False
 
+        content = " ".join([snapshot["title"], *snapshot["texts"]])
+
+        # Check for expected content
+        checks = {
+            "Has 'Asterisk' in title": "asterisk" in content.lower(),
+            "Popup window exists": len(content.strip()) > 0,
+        }
+
+        print("\n   Verification Results:")
+        for check, passed in checks.items():
+            status = "✅" if passed else "❌"
+            print(f"   {status} {check}")
+
+        return all(checks.values())
+
     def verify_fill_button_exists(self):
         """Check if fill button exists in popup"""
         print("🔍 Checking for fill button...")
 
-        script = """
-        tell application "System Events"
-            tell process "Google Chrome"
-                try
-                    set fillButton to button "Fill All Matched Fields" of front window
-                    return true
-                on error
-                    return false
-                end try
-            end tell
-        end tell
-        """
-
-        result = subprocess.run(
-            ["osascript", "-e", script],
-            capture_output=True,
-            text=True
-        )
-
-        exists = "true" in result.stdout.lower()
+        exists = self._snapshot_popup()["has_fill_button"]
         status = "✅" if exists else "⚠️"
         print(f"   {status} Fill button exists: {exists}")
         return exists
@@ -354,31 +988,17 @@ class ChromeExtensionTester:
         """Click a button or element by its text label"""
         print(f"🖱️  Clicking element: {button_text}")
 
-        script = f"""
-        tell application "System Events"
-            tell process "Google Chrome"
-                try
-                    click button "{button_text}" of front window
-                    return true
-                on error errMsg
-                    return "Error: " & errMsg
-                end try
-            end tell
-        end tell
-        """
-
-        result = subprocess.run(
-            ["osascript", "-e", script],
-            capture_output=True,
-            text=True
+        kind, result = self._osa_compiled(
+            "click_button", button_text, self.chrome_process.pid, timeout=_ax_deadline(1)
         )
+        self._snapshot = None
 
-        success = "true" in result.stdout.lower()
+        success = (kind, result) == ("BOOL", "true")
         if success:
             print("   ✅ Click successful")
             time.sleep(1)
         else:
-            print(f"   ⚠️  Click may have failed: {result.stdout.strip()}")
+            print(f"   ⚠️  Click may have failed: {result}")
 
         return success
 
@@ -386,42 +1006,44 @@ class ChromeExtensionTester:
         """
         Get value of a form field using JavaScript execution
 
-        Returns the field value, or None if field doesn't exist
-        """
-        print(f"🔍 Reading form field: {field_id}")
+        Uses the DevTools Protocol connection when available, otherwise
+        Chrome's AppleScript `execute javascript`.
 
-        script = f"""
-        tell application "Google Chrome"
-            try
-                tell active tab of front window
-                    execute javascript "
-                        const field = document.getElementById('{field_id}');
-                        field ? field.value : 'FIELD_NOT_FOUND';
-                    "
-                end tell
-            on error
-                return "ERROR_READING_FIELD"
-            end try
-        end tell
+        Returns the field value, or None if the field doesn't exist or
+        couldn't be read
         """
+        print(f"🔍 Reading form field: {field_id}")
 
-        result = subprocess.run(
-            ["osascript", "-e", script],
-            capture_output=True,
-            text=True
-        )
-
-        value = result.stdout.strip()
+        if self._devtools:
+            expression = (
+                f"(() => {{ const field = document.getElementById({json.dumps(field_id)}); "
+                f"return field ? String(field.value) : '{FIELD_NOT_FOUND}'; }})()"
+            )
+            try:
+                value = self._cdp_evaluate(expression)
+            except Exception as e:
+                print(f"   ❌ Error reading field: {e}")
+                return None
+        else:
+            value = self._read_field_via_applescript(field_id)
+            if value is None:
+                print("   ❌ Error reading field")
+                return None
 
-        if "FIELD_NOT_FOUND" in value:
+        if value == FIELD_NOT_FOUND:
             print(f"   ⚠️  Field '{field_id}' not found")
             return None
-        elif "ERROR" in value:
-            print(f"   ❌ Error reading field: {value}")
-            return None
-        else:
-            print(f"   Value: {value}")
-            return value
+
+        print(f"   Value: {value}")
+        return value
+
+    def _read_field_via_applescript(self, field_id):
+        """
+        Fallback field read through Chrome's `execute javascript` (needs Apple Events JS enabled).
+
+        Returns the value (or FIELD_NOT_FOUND), or None if the script failed.
+        """
+        return self._typed_text(*self._osa_compiled("read_field", json.dumps(field_id)))
 
     def verify_empty_vault_handling(self):
         """
@@ -447,15 +1069,45 @@ class ChromeExtensionTester:
         """Clean up resources"""
         print("\n🧹 Cleaning up...")
 
-        if self.chrome_process:
-            self.chrome_process.terminate()
-            self.chrome_process.wait(timeout=5)
-            print("   ✅ Chrome closed")
+        if self._devtools:
+            self._devtools.close()
+
+        remove_profile = (
+            self.fresh_profile
+            and self.user_data_dir
+            and os.path.exists(self.user_data_dir)
+        )
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            rmtree_future = None
+
+            if self.chrome_process:
+                self.chrome_process.terminate()
+
+            # Start deleting the profile while Chrome shuts down
+            if remove_profile:
+                rmtree_future = executor.submit(
+                    shutil.rmtree, self.user_data_dir, ignore_errors=True
+                )
+
+            if self.chrome_process:
+                try:
+                    self.chrome_process.wait(timeout=CHROME_TERM_GRACE)
+                except subprocess.TimeoutExpired:
+                    self.chrome_process.kill()
+                    self.chrome_process.wait()
+                print("   ✅ Chrome closed")
 
-        if self.user_data_dir and os.path.exists(self.user_data_dir):
-            import shutil
-            shutil.rmtree(self.user_data_dir, ignore_errors=True)
-            print("   ✅ Temp directory removed")
+            if rmtree_future:
+                rmtree_future.result()
+                # Chrome may have written files during shutdown; sweep them up
+                shutil.rmtree(self.user_data_dir, ignore_errors=True)
+                print("   ✅ Temp directory removed")
+
+        self._stop_osa()
+
+        if self._script_dir:
+            shutil.rmtree(self._script_dir, ignore_errors=True)
 
         if self.screenshots:
             print(f"\n📸 Screenshots saved:")
@@ -473,9 +1125,17 @@ class ChromeExtensionTester:
             icon_pos = self.find_extension_icon()
             self.click_extension_icon(*icon_pos)
 
-            self.take_screenshot("popup-open")
-
-            verification_passed = self.verify_popup_content()
+            # Screenshot and Accessibility snapshot are independent subprocess
+            # waits, so overlap them
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                screenshot = executor.submit(
+                    self.take_screenshot, "popup-open", region=_popup_region(*icon_pos)
+                )
+                snapshot = executor.submit(self._snapshot_popup)
+                screenshot.result()
+                popup_snapshot = snapshot.result()
+
+            verification_passed = self.verify_popup_content(popup_snapshot)
 
             print("\n" + "="*50)
             if verification_passed: